@@ -2,7 +2,6 @@
 
 """
 import numpy as np
-import pandas as pd
 from pymbar.timeseries import (statisticalInefficiency,
                                detectEquilibration,
                                subsampleCorrelatedData, )
@@ -48,37 +47,28 @@ def decorrelate_u_nk(df, method='dhdl', drop_duplicates=True,
     kwargs['drop_duplicates'] = drop_duplicates
     kwargs['sort'] = sort
 
+    # Find the current lambda state: select the first row and remove the
+    # first column (Time). Indexing the MultiIndex directly avoids building
+    # the tuples for all rows as df.index.values would.
+    key = df.index[0][1:]
+    if len(key) == 1:
+        # Single key
+        key = key[0]
+
     # Check if the input is u_nk
     try:
-        key = df.index.values[0][1:]
-        if len(key) == 1:
-            key = key[0]
         df[key]
     except KeyError:
         raise ValueError('The input should be u_nk')
 
     if method == 'dhdl':
-        # Find the current column index
-        # Select the first row and remove the first column (Time)
-        key = df.index.values[0][1:]
-        if len(key) > 1:
-            # Multiple keys
-            series = df[key]
-        else:
-            # Single key
-            series = df[key[0]]
+        series = df[key]
     elif method == 'dhdl_all':
         series = df.sum(axis=1)
     elif method == 'dE':
         # Using the same logic as alchemical-analysis
-        key = df.index.values[0][1:]
-        if len(key) == 1:
-            # For the case where there is a single lambda
-            index = df.columns.values.tolist().index(key[0])
-        else:
-            # For the case of more than 1 lambda
-            index = df.columns.values.tolist().index(key)
-            # for the state that is not the last state, take the state+1
+        index = df.columns.values.tolist().index(key)
+        # for the state that is not the last state, take the state+1
         if index + 1 < len(df.columns):
             series = df.iloc[:, index + 1]
             # for the state that is the last state, take the state-1
@@ -129,10 +119,17 @@ def decorrelate_dhdl(df, drop_duplicates=True, sort=True, **kwargs):
     return statistical_inefficiency(df, series, **kwargs)
 
 def _check_multiple_times(df):
-    if isinstance(df, pd.Series):
-        return df.sort_index(0).reset_index('time', name='').duplicated('time').any()
-    else:
-        return df.sort_index(0).reset_index('time').duplicated('time').any()
+    times = df.index.get_level_values('time').to_numpy()
+    return len(np.unique(times)) < len(times)
+
+
+def _drop_duplicates(df):
+    # keep the first row for each time, as DataFrame.drop_duplicates does
+    times = df.index.get_level_values('time').to_numpy()
+    _, first = np.unique(times, return_index=True)
+    mask = np.zeros(len(times), dtype=bool)
+    mask[first] = True
+    return df.iloc[mask]
 
 
 def _check_sorted(df):
@@ -209,8 +206,9 @@ def statistical_inefficiency(df, series=None, lower=None, upper=None, step=None,
 
     Returns
     -------
-    DataFrame
-        `df` subsampled according to subsampled `series`.
+    DataFrame or Series
+        `df` subsampled according to subsampled `series`; of the same type
+        as `df`.
 
     Warning
     -------
@@ -241,37 +239,19 @@ def statistical_inefficiency(df, series=None, lower=None, upper=None, step=None,
        inefficiency was _rounded_ (instead of ``ceil()``) and thus one could
        end up with correlated data.
 
+    .. versionchanged:: 0.7.0
+       With ``drop_duplicates=True``, a Series `df` is now returned as a
+       Series (previously a one-column DataFrame).
+
     """
     if _check_multiple_times(df):
         if drop_duplicates:
-            if isinstance(df, pd.Series):
-                # remove the duplicate based on time
-                drop_duplicates_series = df.reset_index('time', name='').\
-                    drop_duplicates('time')
-                # Rest the time index
-                lambda_names = ['time',]
-                lambda_names.extend(drop_duplicates_series.index.names)
-                df = drop_duplicates_series.set_index('time', append=True).\
-                    reorder_levels(lambda_names)
-            else:
-                # remove the duplicate based on time
-                drop_duplicates_df = df.reset_index('time').drop_duplicates('time')
-                # Rest the time index
-                lambda_names = ['time',]
-                lambda_names.extend(drop_duplicates_df.index.names)
-                df = drop_duplicates_df.set_index('time', append=True).\
-                    reorder_levels(lambda_names)
+            # remove the duplicate based on time
+            df = _drop_duplicates(df)
 
             # Do the same withing with the series
             if series is not None:
-                # remove the duplicate based on time
-                drop_duplicates_series = series.reset_index('time', name='').\
-                    drop_duplicates('time')
-                # Rest the time index
-                lambda_names = ['time',]
-                lambda_names.extend(drop_duplicates_series.index.names)
-                series = drop_duplicates_series.set_index('time', append=True).\
-                    reorder_levels(lambda_names)
+                series = _drop_duplicates(series)
 
         else:
             raise KeyError("Duplicate time values found; statistical inefficiency "
@@ -289,18 +269,21 @@ def statistical_inefficiency(df, series=None, lower=None, upper=None, step=None,
                            "values are sorted by time, increasing.")
 
     if series is not None:
-    
+
         if (len(series) != len(df) or
-            not all(series.reset_index()['time'] == df.reset_index()['time'])):
+            not np.array_equal(series.index.get_level_values('time'),
+                               df.index.get_level_values('time'))):
             raise ValueError("series and data must be sampled at the same times")
-               
+
         series = slicing(series, lower=lower, upper=upper, step=step)
+        # pymbar works on plain arrays; convert once instead of in each call
+        values = series.to_numpy()
 
         # calculate statistical inefficiency of series (could use fft=True but needs test)
-        statinef  = statisticalInefficiency(series, fast=False)
+        statinef  = statisticalInefficiency(values, fast=False)
 
         # use the subsampleCorrelatedData function to get the subsample index
-        indices = subsampleCorrelatedData(series, g=statinef,
+        indices = subsampleCorrelatedData(values, g=statinef,
                                           conservative=conservative)
         df = df.iloc[indices]
     else:
@@ -352,7 +335,7 @@ def equilibrium_detection(df, series=None, lower=None, upper=None, step=None):
         series = slicing(series, lower=lower, upper=upper, step=step)
 
         # calculate statistical inefficiency of series, with equilibrium detection
-        t, statinef, Neff_max  = detectEquilibration(series.values)
+        t, statinef, Neff_max  = detectEquilibration(series.to_numpy())
 
         # we round up
         statinef = int(np.rint(statinef))
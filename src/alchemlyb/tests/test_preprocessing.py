@@ -1,9 +1,12 @@
 """Tests for preprocessing functions.
 
 """
+import functools
+
 import pytest
 
 import numpy as np
+import pandas as pd
 
 import alchemlyb
 from alchemlyb.parsing import gmx
@@ -16,45 +19,109 @@ from alchemtest.gmx import load_benzene, load_ABFE
 import alchemtest.gmx
 
 
-def gmx_benzene_dHdl():
+@functools.lru_cache(maxsize=None)
+def _gmx_benzene_dHdl():
     dataset = alchemtest.gmx.load_benzene()
     return gmx.extract_dHdl(dataset['data']['Coulomb'][0], T=300)
 
 
-@pytest.fixture()
-def gmx_ABFE():
-    dataset = alchemtest.gmx.load_ABFE()
-    return gmx.extract_u_nk(dataset['data']['complex'][0], T=300)
+def gmx_benzene_dHdl():
+    # parse once per session; the shallow copies handed out by this and the
+    # other helpers isolate structural changes (columns, index, attrs) but
+    # share the values with the cached frame, so tests must not write values
+    return _gmx_benzene_dHdl().copy(deep=False)
+
+
+@pytest.fixture(scope="session")
+def _abfe_dataset():
+    return alchemtest.gmx.load_ABFE()
+
+# The ABFE fixtures are shared across the session; tests must not modify them.
+@pytest.fixture(scope="session")
+def gmx_ABFE(_abfe_dataset):
+    return gmx.extract_u_nk(_abfe_dataset['data']['complex'][0], T=300)
+
+@pytest.fixture(scope="session")
+def gmx_ABFE_unsorted(gmx_ABFE):
+    return alchemlyb.concat([gmx_ABFE[-500:], gmx_ABFE[:500]])
+
+@pytest.fixture(scope="session")
+def gmx_ABFE_duplicated(gmx_ABFE):
+    return alchemlyb.concat([gmx_ABFE, gmx_ABFE])
 
-@pytest.fixture()
-def gmx_ABFE_dhdl():
-    dataset = alchemtest.gmx.load_ABFE()
-    return gmx.extract_dHdl(dataset['data']['complex'][0], T=300)
+@pytest.fixture(scope="session")
+def gmx_ABFE_with_sum(gmx_ABFE):
+    return gmx_ABFE, gmx_ABFE.sum(axis=1)
 
-@pytest.fixture()
-def gmx_ABFE_u_nk():
-    dataset = alchemtest.gmx.load_ABFE()
-    return gmx.extract_u_nk(dataset['data']['complex'][-1], T=300)
+@pytest.fixture(scope="session")
+def gmx_ABFE_unsorted_with_sum(gmx_ABFE_unsorted):
+    return gmx_ABFE_unsorted, gmx_ABFE_unsorted.sum(axis=1)
 
-@pytest.fixture()
+@pytest.fixture(scope="session")
+def gmx_ABFE_duplicated_with_sum(gmx_ABFE_duplicated):
+    return gmx_ABFE_duplicated, gmx_ABFE_duplicated.sum(axis=1)
+
+@pytest.fixture(scope="session")
+def gmx_ABFE_dhdl(_abfe_dataset):
+    return gmx.extract_dHdl(_abfe_dataset['data']['complex'][0], T=300)
+
+@pytest.fixture(scope="session")
+def gmx_ABFE_u_nk(_abfe_dataset):
+    return gmx.extract_u_nk(_abfe_dataset['data']['complex'][-1], T=300)
+
+@pytest.fixture(scope="module")
 def gmx_benzene_u_nk_fixture():
+    return gmx_benzene_u_nk()
+
+
+@functools.lru_cache(maxsize=None)
+def _gmx_benzene_u_nk():
     dataset = alchemtest.gmx.load_benzene()
     return gmx.extract_u_nk(dataset['data']['Coulomb'][0], T=300)
 
 
 def gmx_benzene_u_nk():
+    return _gmx_benzene_u_nk().copy(deep=False)
+
+
+@functools.lru_cache(maxsize=None)
+def _gmx_benzene_dHdl_full():
     dataset = alchemtest.gmx.load_benzene()
-    return gmx.extract_u_nk(dataset['data']['Coulomb'][0], T=300)
+    # the first window is already parsed and cached by _gmx_benzene_dHdl()
+    return alchemlyb.concat([_gmx_benzene_dHdl()] +
+                            [gmx.extract_dHdl(i, T=300)
+                             for i in dataset['data']['Coulomb'][1:]])
 
 
 def gmx_benzene_dHdl_full():
+    return _gmx_benzene_dHdl_full().copy(deep=False)
+
+
+@functools.lru_cache(maxsize=None)
+def _gmx_benzene_u_nk_full():
     dataset = alchemtest.gmx.load_benzene()
-    return alchemlyb.concat([gmx.extract_dHdl(i, T=300) for i in dataset['data']['Coulomb']])
+    # the first window is already parsed and cached by _gmx_benzene_u_nk()
+    return alchemlyb.concat([_gmx_benzene_u_nk()] +
+                            [gmx.extract_u_nk(i, T=300)
+                             for i in dataset['data']['Coulomb'][1:]])
 
 
 def gmx_benzene_u_nk_full():
-    dataset = alchemtest.gmx.load_benzene()
-    return alchemlyb.concat([gmx.extract_u_nk(i, T=300) for i in dataset['data']['Coulomb']])
+    return _gmx_benzene_u_nk_full().copy(deep=False)
+
+
+def _is_time_sorted(df):
+    t = df.index.get_level_values('time').to_numpy()
+    return bool(np.all(np.diff(t) >= 0))
+
+
+@pytest.fixture(params=['dHdl', 'u_nk'])
+def benzene_data(request):
+    """Benzene dataset selected by name; only parsed when a test needs it."""
+    return {'dHdl': gmx_benzene_dHdl,
+            'u_nk': gmx_benzene_u_nk,
+            'dHdl_full': gmx_benzene_dHdl_full,
+            'u_nk_full': gmx_benzene_u_nk_full}[request.param]()
 
 class TestSlicing:
     """Test slicing functionality.
@@ -63,125 +130,124 @@ class TestSlicing:
     def slicer(self, *args, **kwargs):
         return slicing(*args, **kwargs)
 
-    @pytest.mark.parametrize(('data', 'size'), [(gmx_benzene_dHdl(), 661),
-                                                (gmx_benzene_u_nk(), 661)])
-    def test_basic_slicing(self, data, size):
-        assert len(self.slicer(data, lower=1000, upper=34000, step=5)) == size
+    @pytest.mark.parametrize(('benzene_data', 'size'), [('dHdl', 661),
+                                                        ('u_nk', 661)],
+                             indirect=['benzene_data'])
+    def test_basic_slicing(self, benzene_data, size):
+        assert len(self.slicer(benzene_data, lower=1000, upper=34000, step=5)) == size
 
-    @pytest.mark.parametrize('data', [gmx_benzene_dHdl(),
-                                      gmx_benzene_u_nk()])
-    def test_disordered_exception(self, data):
+    def test_disordered_exception(self, benzene_data):
         """Test that a shuffled DataFrame yields a KeyError.
 
         """
-        indices = np.arange(len(data))
-        np.random.shuffle(indices)
-
-        df = data.iloc[indices]
+        df = benzene_data.sample(frac=1, random_state=42)
 
         with pytest.raises(KeyError):
             self.slicer(df, lower=200)
 
-    @pytest.mark.parametrize('data', [gmx_benzene_dHdl_full(),
-                                      gmx_benzene_u_nk_full()])
-    def test_duplicated_exception(self, data):
+    @pytest.mark.parametrize('benzene_data', ['dHdl_full', 'u_nk_full'],
+                             indirect=True)
+    def test_duplicated_exception(self, benzene_data):
         """Test that a DataFrame with duplicate times yields a KeyError.
 
         """
         with pytest.raises(KeyError):
-            self.slicer(data.sort_index(0), lower=200)
+            self.slicer(benzene_data.sort_index(axis=0), lower=200)
 
-    def test_subsample_bounds_and_step(self, gmx_ABFE):
+    def test_subsample_bounds_and_step(self, gmx_ABFE_with_sum):
         """Make sure that slicing the series also works
         """
-        subsample = statistical_inefficiency(gmx_ABFE,
-                                             gmx_ABFE.sum(axis=1),
+        df, s = gmx_ABFE_with_sum
+        subsample = statistical_inefficiency(df,
+                                             s,
                                              lower=100,
                                              upper=400,
                                              step=2)
         assert len(subsample) == 76
 
-    def test_multiindex_duplicated(self, gmx_ABFE):
-        subsample = statistical_inefficiency(gmx_ABFE,
-                                             gmx_ABFE.sum(axis=1))
+    def test_multiindex_duplicated(self, gmx_ABFE_with_sum):
+        df, s = gmx_ABFE_with_sum
+        subsample = statistical_inefficiency(df, s)
         assert len(subsample) == 501
 
-    def test_sort_off(self, gmx_ABFE):
-        unsorted = alchemlyb.concat([gmx_ABFE[-500:], gmx_ABFE[:500]])
+    def test_sort_off(self, gmx_ABFE_unsorted_with_sum):
+        unsorted, s = gmx_ABFE_unsorted_with_sum
         with pytest.raises(KeyError):
             statistical_inefficiency(unsorted,
-                                     unsorted.sum(axis=1),
+                                     s,
                                      sort=False)
 
-    def test_sort_on(self, gmx_ABFE):
-        unsorted = alchemlyb.concat([gmx_ABFE[-500:], gmx_ABFE[:500]])
+    def test_sort_on(self, gmx_ABFE_unsorted_with_sum):
+        unsorted, s = gmx_ABFE_unsorted_with_sum
         subsample = statistical_inefficiency(unsorted,
-                                             unsorted.sum(axis=1),
+                                             s,
                                              sort=True)
-        assert subsample.reset_index(0)['time'].is_monotonic_increasing
+        assert _is_time_sorted(subsample)
 
-    def test_sort_on_noseries(self, gmx_ABFE):
-        unsorted = alchemlyb.concat([gmx_ABFE[-500:], gmx_ABFE[:500]])
+    def test_sort_on_noseries(self, gmx_ABFE_unsorted):
+        unsorted = gmx_ABFE_unsorted
         subsample = statistical_inefficiency(unsorted,
                                              None,
                                              sort=True)
-        assert subsample.reset_index(0)['time'].is_monotonic_increasing
+        assert _is_time_sorted(subsample)
 
-    def test_duplication_off(self, gmx_ABFE):
-        duplicated = alchemlyb.concat([gmx_ABFE, gmx_ABFE])
+    def test_duplication_off(self, gmx_ABFE_duplicated_with_sum):
+        duplicated, s = gmx_ABFE_duplicated_with_sum
         with pytest.raises(KeyError):
             statistical_inefficiency(duplicated,
-                                     duplicated.sum(axis=1),
+                                     s,
                                      drop_duplicates=False)
 
-    def test_duplication_on_dataframe(self, gmx_ABFE):
-        duplicated = alchemlyb.concat([gmx_ABFE, gmx_ABFE])
+    def test_duplication_on_dataframe(self, gmx_ABFE_duplicated_with_sum):
+        duplicated, s = gmx_ABFE_duplicated_with_sum
         subsample = statistical_inefficiency(duplicated,
-                                             duplicated.sum(axis=1),
+                                             s,
                                              drop_duplicates=True)
         assert len(subsample) < 1000
 
-    def test_duplication_on_dataframe_noseries(self, gmx_ABFE):
-        duplicated = alchemlyb.concat([gmx_ABFE, gmx_ABFE])
+    def test_duplication_on_dataframe_noseries(self, gmx_ABFE_duplicated):
+        duplicated = gmx_ABFE_duplicated
         subsample = statistical_inefficiency(duplicated,
                                              None,
                                              drop_duplicates=True)
         assert len(subsample) == 1001
 
-    def test_duplication_on_series(self, gmx_ABFE):
-        duplicated = alchemlyb.concat([gmx_ABFE, gmx_ABFE])
-        subsample = statistical_inefficiency(duplicated.sum(axis=1),
-                                             duplicated.sum(axis=1),
+    def test_duplication_on_series(self, gmx_ABFE_duplicated_with_sum):
+        _, s = gmx_ABFE_duplicated_with_sum
+        subsample = statistical_inefficiency(s,
+                                             s.copy(),
                                              drop_duplicates=True)
+        assert isinstance(subsample, pd.Series)
         assert len(subsample) < 1000
 
-    def test_duplication_on_series_noseries(self, gmx_ABFE):
-        duplicated = alchemlyb.concat([gmx_ABFE, gmx_ABFE])
-        subsample = statistical_inefficiency(duplicated.sum(axis=1),
+    def test_duplication_on_series_noseries(self, gmx_ABFE_duplicated_with_sum):
+        _, s = gmx_ABFE_duplicated_with_sum
+        subsample = statistical_inefficiency(s,
                                              None,
                                              drop_duplicates=True)
+        assert isinstance(subsample, pd.Series)
         assert len(subsample) == 1001
 
 class CorrelatedPreprocessors:
 
-    @pytest.mark.parametrize(('data', 'size'), [(gmx_benzene_dHdl(), 4001),
-                                                (gmx_benzene_u_nk(), 4001)])
-    def test_subsampling(self, data, size):
+    @pytest.mark.parametrize(('benzene_data', 'size'), [('dHdl', 4001),
+                                                        ('u_nk', 4001)],
+                             indirect=['benzene_data'])
+    def test_subsampling(self, benzene_data, size):
         """Basic test for execution; resulting size of dataset sensitive to
         machine and depends on algorithm.
         """
-        assert len(self.slicer(data, series=data.iloc[:, 0])) <= size
+        assert len(self.slicer(benzene_data,
+                               series=benzene_data.iloc[:, 0])) <= size
 
-    @pytest.mark.parametrize('data', [gmx_benzene_dHdl(),
-                                      gmx_benzene_u_nk()])
-    def test_no_series(self, data):
+    def test_no_series(self, benzene_data):
         """Check that we get the same result as simple slicing with no Series.
 
         """
-        df_sub = self.slicer(data, lower=200, upper=5000, step=2)
-        df_sliced = slicing(data, lower=200, upper=5000, step=2)
+        df_sub = self.slicer(benzene_data, lower=200, upper=5000, step=2)
+        df_sliced = slicing(benzene_data, lower=200, upper=5000, step=2)
 
-        assert np.all((df_sub == df_sliced))
+        pd.testing.assert_frame_equal(df_sub, df_sliced, check_exact=True)
 
 
 class TestStatisticalInefficiency(TestSlicing, CorrelatedPreprocessors):
@@ -189,27 +255,30 @@ class TestStatisticalInefficiency(TestSlicing, CorrelatedPreprocessors):
     def slicer(self, *args, **kwargs):
         return statistical_inefficiency(*args, **kwargs)
 
-    @pytest.mark.parametrize(('conservative', 'data', 'size'),
+    @pytest.mark.parametrize(('conservative', 'benzene_data', 'size'),
                              [
-                                 (True, gmx_benzene_dHdl(), 2001),  # 0.00:  g = 1.0559445620585415
-                                 (True, gmx_benzene_u_nk(), 2001),  # 'fep': g = 1.0560203916559594
-                                 (False, gmx_benzene_dHdl(), 3789),
-                                 (False, gmx_benzene_u_nk(), 3571),
-                             ])
-    def test_conservative(self, data, size, conservative):
-        sliced = self.slicer(data, series=data.iloc[:, 0], conservative=conservative)
+                                 (True, 'dHdl', 2001),  # 0.00:  g = 1.0559445620585415
+                                 (True, 'u_nk', 2001),  # 'fep': g = 1.0560203916559594
+                                 (False, 'dHdl', 3789),
+                                 (False, 'u_nk', 3571),
+                             ],
+                             indirect=['benzene_data'])
+    def test_conservative(self, benzene_data, size, conservative):
+        sliced = self.slicer(benzene_data, series=benzene_data.iloc[:, 0],
+                             conservative=conservative)
         # results can vary slightly with different machines
         # so possibly do
         # delta = 10
         # assert size - delta < len(sliced) < size + delta
         assert len(sliced) == size
 
-    @pytest.mark.parametrize('series', [
-        gmx_benzene_dHdl()['fep'][:20],   # wrong length
-        gmx_benzene_dHdl()['fep'][::-1],  # wrong time stamps (reversed)
+    @pytest.mark.parametrize('selection', [
+        slice(None, 20),         # wrong length
+        slice(None, None, -1),   # wrong time stamps (reversed)
         ])
-    def test_raise_ValueError_for_mismatched_data(self, series):
+    def test_raise_ValueError_for_mismatched_data(self, selection):
         data = gmx_benzene_dHdl()
+        series = data['fep'][selection]
         with pytest.raises(ValueError):
             self.slicer(data, series=series)
 
@@ -223,31 +292,35 @@ class Test_Units():
     '''Test the preprocessing module.'''
     @staticmethod
     @pytest.fixture(scope='class')
-    def dhdl():
-        dataset = load_benzene()
-        dhdl = extract_dHdl(dataset['data']['Coulomb'][0], 310)
+    def benzene_dataset():
+        return load_benzene()
+
+    @staticmethod
+    @pytest.fixture(scope='class')
+    def dhdl(benzene_dataset):
+        dhdl = extract_dHdl(benzene_dataset['data']['Coulomb'][0], 310)
         return dhdl
 
-    def test_slicing(self, dhdl):
+    @staticmethod
+    @pytest.fixture(scope='class')
+    def u_nk(benzene_dataset):
+        u_nk = extract_u_nk(benzene_dataset['data']['Coulomb'][0], 310)
+        return u_nk
+
+    def test_slicing(self, u_nk):
         '''Test if extract_u_nk assign the attr correctly'''
-        dataset = load_benzene()
-        u_nk = extract_u_nk(dataset['data']['Coulomb'][0], 310)
         new_u_nk = slicing(u_nk)
         assert new_u_nk.attrs['temperature'] == 310
         assert new_u_nk.attrs['energy_unit'] == 'kT'
 
     def test_statistical_inefficiency(self, dhdl):
         '''Test if extract_u_nk assign the attr correctly'''
-        dataset = load_benzene()
-        dhdl = extract_dHdl(dataset['data']['Coulomb'][0], 310)
         new_dhdl = statistical_inefficiency(dhdl)
         assert new_dhdl.attrs['temperature'] == 310
         assert new_dhdl.attrs['energy_unit'] == 'kT'
 
     def test_equilibrium_detection(self, dhdl):
         '''Test if extract_u_nk assign the attr correctly'''
-        dataset = load_benzene()
-        dhdl = extract_dHdl(dataset['data']['Coulomb'][0], 310)
         new_dhdl = equilibrium_detection(dhdl)
         assert new_dhdl.attrs['temperature'] == 310
         assert new_dhdl.attrs['energy_unit'] == 'kT'